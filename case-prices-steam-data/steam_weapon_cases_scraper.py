@@ -1,38 +1,70 @@
 import requests
-import json
+import requests_cache
+from requests.adapters import HTTPAdapter
+import orjson
 import pandas as pd
 from datetime import datetime, timedelta
 import time
 import re
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 from urllib.parse import quote, unquote
 import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Price history JavaScript array embedded in the market page (matched on raw bytes)
+_LINE1_RE = re.compile(rb'var line1=(\[\[.*?\]\]);', re.DOTALL)
+
+# Strip currency symbols and thousands separators from priceoverview values
+_NON_PRICE_RE = re.compile(r'[^\d.]')
+_NON_DIGIT_RE = re.compile(r'\D')
 
 class SteamMarketWeaponCasesScraper:
-    def __init__(self, app_id=730):
+    def __init__(self, app_id=730, max_concurrency=4, use_cache=True):
         """
         Initialize the Steam Market weapon cases scraper
         
         Args:
             app_id: Steam App ID (730 for CS:GO/CS2)
+            max_concurrency: Maximum number of items fetched in parallel
+            use_cache: Cache responses on disk between runs (disable to always fetch fresh pages)
         """
         self.app_id = app_id
+        self.max_concurrency = max_concurrency
+        self.use_cache = use_cache
         self.base_url = "https://steamcommunity.com"
-        self.session = requests.Session()
+        if use_cache:
+            # Responses are cached on disk so reruns (or a restart after a crash) skip re-fetching
+            self.session = requests_cache.CachedSession(
+                'steam_cache',
+                backend='sqlite',
+                expire_after=timedelta(hours=6),
+                allowable_codes=(200,),
+                # Current prices must always be live, so the priceoverview endpoint is never cached
+                urls_expire_after={'steamcommunity.com/market/priceoverview': requests_cache.DO_NOT_CACHE}
+            )
+        else:
+            self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': 'gzip, deflate, br',  # br needs the brotli package to decode
             'Referer': 'https://steamcommunity.com/'
         })
         
+        # Keep-alive connection pool shared by all worker threads
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
         # Calculate date threshold for last year
         self.one_year_ago = datetime.now() - timedelta(days=365)
         
         # Delay settings to avoid getting blocked
         self.delay_between_items = (5.0, 10.0)  # Random delay between items (min, max) in seconds
         self.delay_between_pages = (10.0, 15.0)  # Random delay between pages (min, max) in seconds
-        self.rate_limit_backoff = 60  # Seconds to wait when hitting rate limit
+        self.rate_limit_backoff = 60  # Base seconds for exponential backoff when hitting rate limit
+        self.max_backoff = 600  # Upper bound for a single backoff in seconds
     
     def get_items_from_page(self, page_url):
         """
@@ -42,7 +74,7 @@ class SteamMarketWeaponCasesScraper:
             page_url: Full URL of the page to scrape
             
         Returns:
-            List of dictionaries with 'name' and 'url' keys
+            List of dictionaries with 'name', 'encoded_name' and 'url' keys
         """
         print(f"   Fetching items from page...")
         print(f"   URL: {page_url}")
@@ -58,35 +90,34 @@ class SteamMarketWeaponCasesScraper:
             response = self.session.get(page_url, timeout=20)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                tree = LexborHTMLParser(response.text)
                 
                 # Find all item listings
-                items = soup.find_all('a', class_='market_listing_row_link')
+                items = tree.css('a.market_listing_row_link')
                 
                 if not items:
                     # Try alternative selector
                     print("Trying alternative selector...")
-                    items = soup.find_all('a', href=re.compile(r'/market/listings/'))
+                    items = tree.css('a[href*="/market/listings/"]')
                 
                 print(f"Found {len(items)} items on this page")
                 
                 for item in items:
                     try:
                         # Extract item URL
-                        item_url = item.get('href', '')
+                        item_url = item.attributes.get('href') or ''
                         
                         # Extract item name from URL
                         if '/market/listings/' in item_url:
-                            # Get name from URL
-                            item_name = item_url.split('/market/listings/' + str(self.app_id) + '/')[1]
-                            item_name = unquote(item_name)
+                            # Get name from URL, keeping Steam's own encoding for later requests
+                            encoded_name = item_url.split('/market/listings/' + str(self.app_id) + '/')[1]
                             
                             # Clean up any query parameters
-                            if '?' in item_name:
-                                item_name = item_name.split('?')[0]
+                            encoded_name = encoded_name.split('?')[0]
                             
                             all_items.append({
-                                'name': item_name,
+                                'name': unquote(encoded_name),
+                                'encoded_name': encoded_name,
                                 'url': item_url
                             })
                                 
@@ -105,7 +136,40 @@ class SteamMarketWeaponCasesScraper:
             traceback.print_exc()
             return all_items
     
-    def get_price_history(self, item_name, retry_count=0, max_retries=3):
+    def get_market_page_url(self, encoded_name):
+        """
+        Build the market listing URL for an item
+        
+        Args:
+            encoded_name: URL-encoded name of the item
+            
+        Returns:
+            Full URL of the item's market page
+        """
+        return f"{self.base_url}/market/listings/{self.app_id}/{encoded_name}"
+    
+    def get_backoff_time(self, response, retry_count):
+        """
+        Full-jitter exponential backoff for a rate-limited (429) response
+        Honors the Retry-After header when Steam sends one
+        
+        Args:
+            response: The 429 response
+            retry_count: Current retry attempt
+            
+        Returns:
+            Seconds to wait before retrying
+        """
+        backoff_time = random.uniform(0, min(self.max_backoff, self.rate_limit_backoff * (2 ** retry_count)))
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                backoff_time = max(backoff_time, float(retry_after))
+            except ValueError:
+                pass
+        return backoff_time
+    
+    def get_price_history(self, item_name, retry_count=0, max_retries=3, encoded_name=None):
         """
         Fetch price history for a specific item
         
@@ -113,12 +177,15 @@ class SteamMarketWeaponCasesScraper:
             item_name: Name of the item
             retry_count: Current retry attempt
             max_retries: Maximum number of retries
+            encoded_name: URL-encoded name as found on the listing page (encoded from item_name if None)
             
         Returns:
-            List of dictionaries with date, price, volume
+            DataFrame with item_name, date, price, volume
         """
         # First, visit the market page
-        market_page_url = f"{self.base_url}/market/listings/{self.app_id}/{quote(item_name)}"
+        if encoded_name is None:
+            encoded_name = quote(item_name)
+        market_page_url = self.get_market_page_url(encoded_name)
         
         try:
             # Get the main page to establish cookies
@@ -127,94 +194,199 @@ class SteamMarketWeaponCasesScraper:
             if page_response.status_code == 429:
                 # Rate limited - back off
                 if retry_count < max_retries:
-                    backoff_time = self.rate_limit_backoff * (retry_count + 1)
-                    print(f"      Rate limited (429). Backing off for {backoff_time}s...")
+                    backoff_time = self.get_backoff_time(page_response, retry_count)
+                    print(f"      [{item_name}] Rate limited (429). Backing off for {backoff_time:.1f}s...")
                     time.sleep(backoff_time)
-                    return self.get_price_history(item_name, retry_count + 1, max_retries)
+                    return self.get_price_history(item_name, retry_count + 1, max_retries, encoded_name)
                 else:
-                    print(f"      Max retries reached for rate limiting")
+                    print(f"      [{item_name}] Max retries reached for rate limiting")
                     return None
             
             if page_response.status_code != 200:
-                print(f"     Market page returned status {page_response.status_code}")
+                print(f"     [{item_name}] Market page returned status {page_response.status_code}")
                 return None
             
-            time.sleep(random.uniform(1.0, 2.0))  # Random delay after successful request
+            # Random delay after successful request, counted from now so parsing overlaps it
+            resume_at = time.monotonic()
+            if not getattr(page_response, 'from_cache', False):
+                resume_at += random.uniform(1.0, 2.0)
             
             # Extract data from page source
-            return self.extract_from_page_source(page_response.text, item_name)
+            price_data = self.extract_from_page_source(page_response.content, item_name)
+            
+            time.sleep(max(0.0, resume_at - time.monotonic()))
+            return price_data
                 
         except Exception as e:
             print(f"      Error fetching price history for {item_name}: {e}")
             return None
     
-    def extract_from_page_source(self, html, item_name):
+    def get_current_price(self, item_name, retry_count=0, max_retries=3):
+        """
+        Fetch today's price for a specific item from the small priceoverview JSON endpoint
+        Much cheaper than the market page when the history is not needed
+        
+        Args:
+            item_name: Name of the item
+            retry_count: Current retry attempt
+            max_retries: Maximum number of retries
+            
+        Returns:
+            DataFrame with a single item_name, date, price, volume row (or None)
+        """
+        try:
+            response = self.session.get(
+                f"{self.base_url}/market/priceoverview/",
+                params={'appid': self.app_id, 'currency': 1, 'market_hash_name': item_name},
+                timeout=10
+            )
+            
+            if response.status_code == 429:
+                # Rate limited - back off (this endpoint is limited harder than the market pages)
+                if retry_count < max_retries:
+                    backoff_time = self.get_backoff_time(response, retry_count)
+                    print(f"      [{item_name}] Rate limited (429). Backing off for {backoff_time:.1f}s...")
+                    time.sleep(backoff_time)
+                    return self.get_current_price(item_name, retry_count + 1, max_retries)
+                else:
+                    print(f"      [{item_name}] Max retries reached for rate limiting")
+                    return None
+            
+            if response.status_code != 200:
+                print(f"     [{item_name}] Price overview returned status {response.status_code}")
+                return None
+            
+            overview = response.json()
+            if not overview.get('success'):
+                print(f"       [{item_name}] Price overview not available")
+                return None
+            
+            # Prices come formatted, e.g. "$1,234.56"; prefer the median like the history data
+            price_str = overview.get('median_price') or overview.get('lowest_price')
+            if not price_str:
+                print(f"       [{item_name}] No current price listed")
+                return None
+            price = float(_NON_PRICE_RE.sub('', price_str))
+            volume = int(_NON_DIGIT_RE.sub('', overview.get('volume', '')) or 0)
+            
+            print(f"      [{item_name}] Current price: ${price:.2f}")
+            return pd.DataFrame({
+                'item_name': [item_name],
+                'date': [datetime.now()],
+                'price': [price],
+                'volume': [volume]
+            })
+            
+        except Exception as e:
+            print(f"      Error fetching current price for {item_name}: {e}")
+            return None
+    
+    def has_fresh_cache(self, url):
+        """
+        Check whether a GET for this URL will be answered from the cache without hitting Steam
+        Expired entries are kept for revalidation, so existence alone is not enough
+        
+        Args:
+            url: Full URL that is about to be requested
+            
+        Returns:
+            True if a non-expired cached response exists
+        """
+        if not self.use_cache:
+            return False
+        
+        request = self.session.prepare_request(requests.Request('GET', url))
+        key = self.session.cache.create_key(request, match_headers=self.session.settings.match_headers)
+        cached_response = self.session.cache.get_response(key)
+        return cached_response is not None and not cached_response.is_expired
+    
+    def fetch_item_price_history(self, item, mode='history'):
+        """
+        Wait a random delay, then fetch price data for one item
+        Runs inside a worker thread, so each worker keeps its own polite pace
+        
+        Args:
+            item: Dictionary with 'name', 'encoded_name' and 'url' keys
+            mode: 'history' for the last year of prices, 'current' for today's price only
+            
+        Returns:
+            DataFrame with item_name, date, price, volume (or None)
+        """
+        # No need to pace requests that will be answered from the local cache
+        cached = mode == 'history' and self.has_fresh_cache(self.get_market_page_url(item['encoded_name']))
+        if not cached:
+            delay = random.uniform(*self.delay_between_items)
+            time.sleep(delay)
+        
+        if mode == 'current':
+            return self.get_current_price(item['name'])
+        return self.get_price_history(item['name'], encoded_name=item['encoded_name'])
+    
+    def extract_from_page_source(self, content, item_name):
         """
         Extract price history data from the HTML page source
         
         Args:
-            html: HTML source of the market page
+            content: Raw (undecoded) bytes of the market page
             item_name: Name of the item
             
         Returns:
-            List of dictionaries with date, price, volume (filtered to last year)
+            DataFrame with item_name, date, price, volume (filtered to last year)
         """
         try:
             # Look for the line_data variable in JavaScript
-            pattern = r'var line1=(\[\[.*?\]\]);'
-            match = re.search(pattern, html, re.DOTALL)
+            match = _LINE1_RE.search(content)
             
             if match:
-                json_str = match.group(1)
+                json_bytes = match.group(1)
                 
                 try:
                     # Parse the JSON array
-                    price_data = json.loads(json_str)
+                    price_data = orjson.loads(json_bytes)
                     
                     if not price_data:
                         return None
                     
-                    parsed_data = []
-                    for entry in price_data:
-                        try:
-                            # Entry format: ["Mon, 01 Jan 2024 01:00:00 GMT", 1.23, "456"]
-                            date_str = entry[0]
-                            price = float(entry[1])
-                            volume = int(entry[2]) if len(entry) > 2 else 0
-                            
-                            # Parse the date
-                            date_obj = datetime.strptime(date_str, "%b %d %Y %H: +0")
-                            
-                            # Filter: only keep data from last year
-                            if date_obj >= self.one_year_ago:
-                                parsed_data.append({
-                                    'item_name': item_name,
-                                    'date': date_obj,
-                                    'price': price,
-                                    'volume': volume
-                                })
-                        except Exception as e:
-                            continue
+                    # Entry format: ["Jan 01 2024 01: +0", 1.23, "456"]
+                    # Fixed columns, so short or malformed entries become NaN for that row only
+                    raw = pd.DataFrame(
+                        [(entry + [None] * 3)[:3] if isinstance(entry, list) else [None] * 3 for entry in price_data],
+                        columns=['date', 'price', 'volume']
+                    )
+                    
+                    # Parse all dates at once; malformed entries become NaT and are dropped
+                    dates = pd.to_datetime(raw['date'], format="%b %d %Y %H: +0", errors='coerce')
+                    prices = pd.to_numeric(raw['price'], errors='coerce')
+                    volumes = pd.to_numeric(raw['volume'], errors='coerce').fillna(0).astype(int)
+                    
+                    # Filter: only keep data from last year
+                    mask = (dates >= self.one_year_ago) & prices.notna()
+                    parsed_data = pd.DataFrame({
+                        'item_name': item_name,
+                        'date': dates[mask],
+                        'price': prices[mask],
+                        'volume': volumes[mask]
+                    }).reset_index(drop=True)
                     
-                    if parsed_data:
-                        print(f"      Extracted {len(parsed_data)} price points (last year)")
+                    if not parsed_data.empty:
+                        print(f"      [{item_name}] Extracted {len(parsed_data)} price points (last year)")
                         return parsed_data
                     else:
-                        print(f"        No data from last year found")
+                        print(f"        [{item_name}] No data from last year found")
                         return None
                         
-                except json.JSONDecodeError as e:
-                    print(f"      JSON parse error: {e}")
+                except orjson.JSONDecodeError as e:
+                    print(f"      [{item_name}] JSON parse error: {e}")
                     return None
             else:
-                print(f"       Price data pattern not found in page")
+                print(f"       [{item_name}] Price data pattern not found in page")
                 return None
             
         except Exception as e:
-            print(f"        Error extracting from page source: {e}")
+            print(f"        [{item_name}] Error extracting from page source: {e}")
             return None
     
-    def scrape_multiple_pages(self, page_urls, output_filename=None):
+    def scrape_multiple_pages(self, page_urls, output_filename=None, mode='history'):
         """
         Scrape price history for items from multiple pages
         Saves data progressively after each item to avoid data loss
@@ -222,16 +394,23 @@ class SteamMarketWeaponCasesScraper:
         Args:
             page_urls: List of page URLs to scrape
             output_filename: CSV filename to save progressively (auto-generated if None)
+            mode: 'history' scrapes the last year from each market page,
+                  'current' only fetches today's price from the priceoverview endpoint
             
         Returns:
             pandas DataFrame with all price data
         """
+        if mode not in ('history', 'current'):
+            raise ValueError(f"mode must be 'history' or 'current', got {mode!r}")
+        
         print("=" * 80)
         print("🎮 Steam Market Weapon Cases Price Scraper - CS:GO/CS2")
         print("=" * 80)
         print(f"\n  Configuration:")
         print(f"   Pages to scrape: {len(page_urls)}")
+        print(f"   Mode: {mode}")
         print(f"   Delay between items: {self.delay_between_items[0]}-{self.delay_between_items[1]}s")
+        print(f"   Parallel item fetches: {self.max_concurrency}")
         print(f"   Delay between pages: {self.delay_between_pages[0]}-{self.delay_between_pages[1]}s")
         print(f"   Date filter: Last 365 days (from {self.one_year_ago.strftime('%Y-%m-%d')})")
         print(f"   Progressive saving:  ENABLED (saves after each item)")
@@ -244,6 +423,7 @@ class SteamMarketWeaponCasesScraper:
         print(f"   Output file: {output_filename}")
         
         all_items = []
+        seen_names = set()  # Item names already collected, kept across pages
         
         # Step 1: Collect items from all pages
         print("\n" + "=" * 80)
@@ -256,15 +436,13 @@ class SteamMarketWeaponCasesScraper:
             
             if items:
                 # Remove duplicates
-                new_items = []
-                existing_names = {item['name'] for item in all_items}
+                before = len(all_items)
                 for item in items:
-                    if item['name'] not in existing_names:
-                        new_items.append(item)
-                        existing_names.add(item['name'])
+                    if item['name'] not in seen_names:
+                        seen_names.add(item['name'])
+                        all_items.append(item)
                 
-                all_items.extend(new_items)
-                print(f"    Added {len(new_items)} new items (Total: {len(all_items)})")
+                print(f"    Added {len(all_items) - before} new items (Total: {len(all_items)})")
             
             # Delay before next page (except for last page)
             if page_num < len(page_urls):
@@ -284,35 +462,41 @@ class SteamMarketWeaponCasesScraper:
         print(f" Saving progressively to: {output_filename}")
         print("=" * 80)
         
-        all_price_data = []
+        all_price_data = []  # One DataFrame per scraped item
+        total_records = 0
         scraped_items = []
+        header_written = False
         
-        for idx, item in enumerate(all_items, 1):
-            item_name = item['name']
-            print(f"\n   [{idx}/{len(all_items)}]  {item_name}")
-            
-            price_data = self.get_price_history(item_name)
+        # Fetch items in parallel; results are handled here on the main thread
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        try:
+            futures = {executor.submit(self.fetch_item_price_history, item, mode): item for item in all_items}
             
-            if price_data:
-                all_price_data.extend(price_data)
-                scraped_items.append(item_name)
-                print(f"      Total data points collected: {len(all_price_data):,}")
+            for idx, future in enumerate(as_completed(futures), 1):
+                item_name = futures[future]['name']
+                print(f"\n   [{idx}/{len(all_items)}]  {item_name}")
                 
-                # Save progressively after each successful scrape
-                if all_price_data:
-                    temp_df = pd.DataFrame(all_price_data)
-                    temp_df = temp_df[['item_name', 'date', 'price']]
-                    temp_df = temp_df.sort_values(['item_name', 'date']).reset_index(drop=True)
-                    temp_df.to_csv(output_filename, index=False)
-                    print(f"      Saved! ({len(scraped_items)} items, {len(all_price_data):,} records)")
-            else:
-                print(f"       No price data available (skipped)")
-            
-            # Delay before next item (except for last item)
-            if idx < len(all_items):
-                delay = random.uniform(*self.delay_between_items)
-                print(f"      Waiting {delay:.1f}s before next item...")
-                time.sleep(delay)
+                price_data = future.result()
+                
+                if price_data is not None:
+                    all_price_data.append(price_data)
+                    total_records += len(price_data)
+                    scraped_items.append(item_name)
+                    print(f"      Total data points collected: {total_records:,}")
+                    
+                    # Save progressively: append only this item's rows (sorted once in Step 3)
+                    item_df = price_data[['item_name', 'date', 'price']]
+                    item_df.to_csv(output_filename, mode='a' if header_written else 'w',
+                                   header=not header_written, index=False)
+                    header_written = True
+                    print(f"      Saved! ({len(scraped_items)} items, {total_records:,} records)")
+                else:
+                    print(f"       No price data available (skipped)")
+        except BaseException:
+            # Ctrl-C or an error: drop queued items instead of fetching them in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
         
         # Step 3: Create final DataFrame
         if all_price_data:
@@ -320,7 +504,7 @@ class SteamMarketWeaponCasesScraper:
             print(" Step 3: Creating final dataset...")
             print("=" * 80)
             
-            df = pd.DataFrame(all_price_data)
+            df = pd.concat(all_price_data, ignore_index=True)
             
             # Select and order columns as requested: item_name, date, price
             df = df[['item_name', 'date', 'price']]
@@ -7,52 +7,72 @@ This data can be used to correlate major events with price spikes
 """
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from selectolax.lexbor import LexborHTMLParser
 import pandas as pd
 from datetime import datetime, timedelta
 import re
 import time
+import functools
 
+# Shared session so repeated requests reuse the same keep-alive connection
+SESSION = requests.Session()
+SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept-Encoding': 'gzip, deflate, br'  # br needs the brotli package to decode
+})
+SESSION.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=32))
+
+# Patterns applied to every tournament row, compiled once
+_DATE_RE = re.compile(r'([A-Z][a-z]{2}\s+\d{1,2}(?:\s*-\s*(?:[A-Z][a-z]{2}\s+)?\d{1,2})?,\s*202[45])')
+_PRIZE_RE = re.compile(r'\$[\d,]+')
+
+# Month abbreviations used in Liquipedia date ranges (avoids locale-aware strptime)
+MONTHS = {
+    'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+    'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
+}
+
+@functools.lru_cache(maxsize=1024)
 def parse_date_range(date_str):
     """
     Parse date strings like 'Nov 24 - Dec 14, 2025' or 'Jan 22 - 28, 2024'
     Returns start_date and end_date as datetime objects
+    Results are memoized since the same ranges repeat across rows
     """
     try:
         # Handle cases like "Nov 24 - Dec 14, 2025" or "Nov 19 - 23, 2025"
         if ' - ' in date_str:
             parts = date_str.split(' - ')
-            year = parts[1].split(', ')[-1].strip()
-            
-            # Start date
-            start_parts = parts[0].strip().split()
-            if len(start_parts) == 2:  # e.g., "Nov 24"
-                start_month = start_parts[0]
-                start_day = start_parts[1]
-                start_date_str = f"{start_month} {start_day}, {year}"
-            else:
-                start_date_str = parts[0].strip() + f", {year}"
             
-            # End date
+            # End date must carry the year after a comma
             end_str = parts[1].strip()
+            if ',' not in end_str:
+                return None, None
+            end_before_comma, year = end_str.rsplit(',', 1)
+            year = int(year)
             
-            # Check if end has full date (Month Day, Year) or just (Day, Year)
-            if ',' in end_str:
-                end_parts_before_comma = end_str.split(',')[0].strip().split()
-                
-                if len(end_parts_before_comma) == 2:  # Has month and day e.g., "Dec 14"
-                    end_date_str = end_str
-                elif len(end_parts_before_comma) == 1:  # Only day e.g., "23"
-                    # Use the same month as start date
-                    end_day = end_parts_before_comma[0]
-                    end_date_str = f"{start_month} {end_day}, {year}"
-                else:
-                    return None, None
+            # Start date, e.g. "Nov 24"
+            start_parts = parts[0].strip().split()
+            if len(start_parts) != 2:
+                return None, None
+            start_month = MONTHS[start_parts[0]]
+            start_day = int(start_parts[1])
+            
+            # Check if end has full date (Month Day) or just (Day)
+            end_parts = end_before_comma.split()
+            if len(end_parts) == 2:  # Has month and day e.g., "Dec 14"
+                end_month = MONTHS[end_parts[0]]
+                end_day = int(end_parts[1])
+            elif len(end_parts) == 1:  # Only day e.g., "23"
+                # Use the same month as start date
+                end_month = start_month
+                end_day = int(end_parts[0])
             else:
-                end_date_str = end_str + f", {year}"
+                return None, None
             
-            start_date = datetime.strptime(start_date_str, '%b %d, %Y')
-            end_date = datetime.strptime(end_date_str, '%b %d, %Y')
+            start_date = datetime(year, start_month, start_day)
+            end_date = datetime(year, end_month, end_day)
             
             return start_date, end_date
     except Exception as e:
@@ -69,84 +89,66 @@ def scrape_tournaments():
     url = "https://liquipedia.net/counterstrike/S-Tier_Tournaments"
     
     print(" Fetching tournament data from Liquipedia...")
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
     
-    response = requests.get(url, headers=headers)
+    response = SESSION.get(url)
     response.raise_for_status()
     
-    soup = BeautifulSoup(response.content, 'html.parser')
+    tree = LexborHTMLParser(response.content)
     
     tournaments = []
     
     # Find all gridRow divs (each row represents one tournament)
-    tournament_rows = soup.find_all('div', class_='gridRow')
+    tournament_rows = tree.css('div.gridRow')
     
     print(f" Found {len(tournament_rows)} tournament rows")
     
     for row in tournament_rows:
-        try:
-            # Get all text content from the row
-            text_content = row.get_text(separator='|', strip=True)
-            
-            # Only process 2024 and 2025 tournaments
-            if '2024' not in text_content and '2025' not in text_content:
-                continue
-            
-            # Extract tournament name from the Tournament Header div
-            header_div = row.find('div', class_='Tournament')
-            if not header_div:
-                continue
-            
-            # Get all links and find the one with actual tournament name
-            name_links = header_div.find_all('a', href=re.compile(r'/counterstrike/'))
-            tournament_name = None
-            
-            for link in name_links:
-                text = link.get_text(strip=True)
-                if text and len(text) > 3:  # Avoid empty or very short names
-                    tournament_name = text
-            
-            if not tournament_name:
-                continue
-            
-            # Extract date using regex
-            date_match = re.search(r'([A-Z][a-z]{2}\s+\d{1,2}(?:\s*-\s*(?:[A-Z][a-z]{2}\s+)?\d{1,2})?,\s*202[45])', text_content)
-            
-            if not date_match:
-                continue
-                
-            date_str = date_match.group(1)
-            
-            # Parse dates
-            start_date, end_date = parse_date_range(date_str)
-            
-            if not start_date or not end_date:
-                continue
-            
-            # Extract prize pool
-            prize_match = re.search(r'\$[\d,]+', text_content)
-            prize_pool = prize_match.group(0) if prize_match else 'Unknown'
-            
-            # Extract location from flag image
-            location = 'Unknown'
-            flag_img = row.find('img', src=re.compile(r'.*hd\.png'))
-            if flag_img and 'alt' in flag_img.attrs:
-                location = flag_img['alt']
-            
-            tournaments.append({
-                'tournament_name': tournament_name,
-                'start_date': start_date,
-                'end_date': end_date,
-                'date_range': date_str,
-                'prize_pool': prize_pool,
-                'location': location
-            })
+        # Get all text content from the row once; every check below reuses it
+        text_content = row.text(separator='|', strip=True)
+        
+        # Only process 2024 and 2025 tournaments (cheap substring test before any regex)
+        if '2024' not in text_content and '2025' not in text_content:
+            continue
+        
+        # Extract date using regex
+        date_match = _DATE_RE.search(text_content)
+        
+        if not date_match:
+            continue
             
-        except Exception as e:
-            # Continue silently as some rows may not have all data
+        date_str = date_match.group(1)
+        
+        # Parse dates (parse_date_range handles its own errors)
+        start_date, end_date = parse_date_range(date_str)
+        
+        if not start_date or not end_date:
+            continue
+        
+        # Tournament name is the last link in the Tournament Header div with a real name
+        name_texts = [link.text(strip=True) for link in row.css('div.Tournament a[href*="/counterstrike/"]')]
+        tournament_name = next((text for text in reversed(name_texts) if len(text) > 3), None)  # Avoid empty or very short names
+        
+        if not tournament_name:
             continue
+        
+        # Extract prize pool
+        prize_match = _PRIZE_RE.search(text_content) if '$' in text_content else None
+        prize_pool = prize_match.group(0) if prize_match else 'Unknown'
+        
+        # Extract location from flag image
+        location = 'Unknown'
+        flag_img = row.css_first('img[src*="hd.png"]')
+        if flag_img and flag_img.attributes.get('alt'):
+            location = flag_img.attributes['alt']
+        
+        tournaments.append({
+            'tournament_name': tournament_name,
+            'start_date': start_date,
+            'end_date': end_date,
+            'date_range': date_str,
+            'prize_pool': prize_pool,
+            'location': location
+        })
     
     return tournaments
 